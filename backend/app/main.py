@@ -40,12 +40,18 @@ async def _start_background_tasks() -> None:  # pragma: no cover - runtime wirin
     
     # 时钟推进循环（调用 TimeManager.tick()）
     async def _clock_loop():
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
         while True:
-            # 每次调用推进 1 秒逻辑时间
-            deps.time_manager.tick()
-            # 调用间隔由 TimeManager 控制（可通过 API 调整）
-            interval = deps.time_manager.get_tick_interval()
-            await asyncio.sleep(interval)
+            # 每次调用推进 1 秒逻辑时间；tick 内含同步 SQLite 写入，放到线程池执行
+            await asyncio.to_thread(deps.time_manager.tick)
+            # 调用间隔由 TimeManager 控制（可通过 API 调整）；
+            # 按截止时间休眠以扣除 tick 自身耗时，落后时不补 tick
+            next_tick += deps.time_manager.get_tick_interval()
+            now = loop.time()
+            if next_tick < now:
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
 
     app.state._clock_task = asyncio.create_task(_clock_loop())
     print("[main] Background tasks started: EventBus + TimeManager clock")
@@ -58,7 +64,7 @@ async def _stop_background_tasks() -> None:  # pragma: no cover - runtime wiring
     clock_task = getattr(app.state, "_clock_task", None)
     if clock_task:
         clock_task.cancel()
-        with contextlib.suppress(Exception):
+        with contextlib.suppress(asyncio.CancelledError, Exception):
             await clock_task
     
     # 停止事件消费循环
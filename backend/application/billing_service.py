@@ -117,9 +117,8 @@ class BillingService:
             room_id=room_id,
             period_start=period_start,
             period_end=period_end,
-            total_fee=0.0,
-            details=list(completed),
         )
+        # add_record 同时维护 details 与 total_fee，明细只经由它加入一次
         for rec in completed:
             bill.add_record(rec)
         self.repository.add_ac_bill(bill)
@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Callable, Coroutine, Dict, List, Optional
 from uuid import uuid4
 
+logger = logging.getLogger(__name__)
+
 
 class EventType(str, Enum):
     """事件类型枚举"""
@@ -38,6 +41,7 @@ class AsyncEventBus:
         self._handlers: Dict[EventType, List[Callable[[SchedulerEvent], Coroutine[Any, Any, None]]]] = {}
         self._running: bool = False
         self._consumer_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._lock = asyncio.Lock()
 
     def register_handler(
@@ -70,8 +74,28 @@ class AsyncEventBus:
         """
         同步发布事件（供非异步上下文调用）
         
-        返回 True 表示成功入队，False 表示队列满
+        在事件循环线程内（或尚未启动事件循环时）直接入队，返回 True 表示成功入队，
+        False 表示队列满。
+        在事件循环以外的线程（如线程池中的 tick）调用时，转交给事件循环线程入队，
+        不等待入队结果：返回 True 仅表示已提交，实际入队时仍可能因队列满被丢弃；
+        事件循环已关闭（如停机过程中 tick 仍在运行）时返回 False。
         """
+        loop = self._loop
+        if loop is not None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                try:
+                    loop.call_soon_threadsafe(self._put_nowait, event)
+                except RuntimeError:
+                    # 事件循环已关闭
+                    return False
+                return True
+        return self._put_nowait(event)
+
+    def _put_nowait(self, event: SchedulerEvent) -> bool:
         try:
             self._queue.put_nowait(event)
             return True
@@ -93,8 +117,8 @@ class AsyncEventBus:
                 for handler in handlers:
                     try:
                         await handler(event)
-                    except Exception as e:
-                        print(f"[EventBus] Handler error for {event.event_type}: {e}")
+                    except Exception:
+                        logger.exception("[EventBus] Handler error for %s", event.event_type)
                 self._queue.task_done()
             except asyncio.TimeoutError:
                 continue
@@ -106,8 +130,9 @@ class AsyncEventBus:
         if self._running:
             return
         self._running = True
+        self._loop = asyncio.get_running_loop()
         self._consumer_task = asyncio.create_task(self._consume_loop())
-        print("[EventBus] Started")
+        logger.debug("[EventBus] Started")
 
     async def stop(self) -> None:
         """停止事件消费循环"""
@@ -119,7 +144,8 @@ class AsyncEventBus:
             except asyncio.CancelledError:
                 pass
             self._consumer_task = None
-        print("[EventBus] Stopped")
+        self._loop = None
+        logger.debug("[EventBus] Stopped")
 
     def pending_count(self) -> int:
         """待处理事件数量"""
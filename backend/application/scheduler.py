@@ -1,9 +1,12 @@
 """Scheduler - 事件驱动的调度器，负责空调服务的调度业务逻辑。"""
 from __future__ import annotations
 
+import asyncio
+import logging
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Callable, Iterable, List, Optional, TYPE_CHECKING
+from typing import Callable, ContextManager, Iterable, List, Optional, TYPE_CHECKING
 
 from app.config import AppConfig
 from application.events import AsyncEventBus, SchedulerEvent, EventType
@@ -16,6 +19,8 @@ if TYPE_CHECKING:
     from application.billing_service import BillingService
     from infrastructure.repository import RoomRepository
 
+logger = logging.getLogger(__name__)
+
 
 def compare_speed(speed_a: str, speed_b: str) -> int:
     """比较两个风速的优先级"""
@@ -24,7 +29,8 @@ def compare_speed(speed_a: str, speed_b: str) -> int:
 
 def select_victim_by_rules(services: List[ServiceObject], new_speed: str) -> Optional[ServiceObject]:
     """根据调度规则选择被抢占的服务对象"""
-    slower_items = [obj for obj in services if compare_speed(obj.speed, new_speed) < 0]
+    new_priority = SPEED_PRIORITY.get(new_speed, 0)
+    slower_items = [obj for obj in services if obj.speed_priority < new_priority]
     if not slower_items:
         return None
     if len(slower_items) == 1:
@@ -34,8 +40,8 @@ def select_victim_by_rules(services: List[ServiceObject], new_speed: str) -> Opt
     if len(distinct_speeds) == 1:
         return max(slower_items, key=lambda obj: obj.served_seconds)
 
-    min_priority = min(SPEED_PRIORITY.get(obj.speed, 0) for obj in slower_items)
-    candidates = [obj for obj in slower_items if SPEED_PRIORITY.get(obj.speed, 0) == min_priority]
+    min_priority = min(obj.speed_priority for obj in slower_items)
+    candidates = [obj for obj in slower_items if obj.speed_priority == min_priority]
     return max(candidates, key=lambda obj: obj.served_seconds)
 
 
@@ -65,6 +71,7 @@ class Scheduler:
         self._room_lookup: Callable[[str], Optional[Room]] = lambda room_id: None
         self._iter_rooms: Callable[[], Iterable[Room]] = lambda: []
         self._save_room: Callable[[Room], None] = lambda room: None
+        self._room_batch: Callable[[], ContextManager[None]] = nullcontext
         self._billing_service: Optional["BillingService"] = None
         
         # 注册异步事件处理器
@@ -108,6 +115,7 @@ class Scheduler:
         self._room_lookup = repository.get_room
         self._iter_rooms = repository.list_rooms
         self._save_room = repository.save_room
+        self._room_batch = repository.batch
         self.time_manager.set_room_repository(repository)
 
     def set_billing_service(self, billing_service: "BillingService") -> None:
@@ -117,9 +125,32 @@ class Scheduler:
         self.time_manager.set_fee_callback(billing_service.tick_fee)
 
     # ================== 异步事件处理器 ==================
+    # 处理器运行在事件循环上，而调度逻辑包含同步的 SQLite 读写，
+    # 因此放到线程池中执行，避免阻塞事件循环（与同步路由的执行方式一致）。
+    # 线程中的处理与 tick 并发，需在 repo.batch() 内执行，与 tick 及
+    # UseACService 的操作串行化
     async def _handle_time_slice_expired(self, event: SchedulerEvent) -> None:
         """处理时间片到期事件"""
-        waiting_room_id = event.room_id
+        await asyncio.to_thread(self._run_in_batch, self._rotate_on_time_slice, event.room_id)
+
+    async def _handle_temperature_reached(self, event: SchedulerEvent) -> None:
+        """处理温度达标事件"""
+        logger.debug("[Scheduler] Temperature reached for room %s", event.room_id)
+        await asyncio.to_thread(self._run_in_batch, self.release_service, event.room_id)
+
+    async def _handle_auto_restart(self, event: SchedulerEvent) -> None:
+        """处理自动重启事件"""
+        speed = event.payload.get("speed", "MID") if event.payload else "MID"
+        logger.debug("[Scheduler] Auto restart for room %s with speed %s", event.room_id, speed)
+        await asyncio.to_thread(self._run_in_batch, self.on_new_request, event.room_id, speed)
+
+    def _run_in_batch(self, func: Callable[..., None], *args: object) -> None:
+        """在房间仓储的写入批次内执行调度操作"""
+        with self._room_batch():
+            func(*args)
+
+    def _rotate_on_time_slice(self, waiting_room_id: str) -> None:
+        """时间片轮转：服务最长的对象让出位置给到期的等待对象"""
         waiting_service = self._get_wait_entry(waiting_room_id)
         if not waiting_service:
             return
@@ -129,7 +160,7 @@ class Scheduler:
         if not victim:
             return
         
-        print(f"[Scheduler] Time slice expired: rotating {victim.room_id} -> {waiting_room_id}")
+        logger.debug("[Scheduler] Time slice expired: rotating %s -> %s", victim.room_id, waiting_room_id)
         
         # 将服务最长的移到等待队列
         self._move_to_waiting(victim, time_slice_enforced=True)
@@ -140,17 +171,6 @@ class Scheduler:
         waiting_service.cancel_timer()
         self.assign_service(waiting_service)
 
-    async def _handle_temperature_reached(self, event: SchedulerEvent) -> None:
-        """处理温度达标事件"""
-        print(f"[Scheduler] Temperature reached for room {event.room_id}")
-        self.release_service(event.room_id)
-
-    async def _handle_auto_restart(self, event: SchedulerEvent) -> None:
-        """处理自动重启事件"""
-        speed = event.payload.get("speed", "MID") if event.payload else "MID"
-        print(f"[Scheduler] Auto restart for room {event.room_id} with speed {speed}")
-        self.on_new_request(event.room_id, speed)
-
     # ================== Public API ==================
     def on_new_request(self, room_id: str, speed: str) -> None:
         """处理新的空调服务请求"""
@@ -158,23 +178,23 @@ class Scheduler:
         service = ServiceObject(room_id=room_id, speed=speed)
 
         services = self._list_service_entries()
-        print(f"[Scheduler] on_new_request: room={room_id}, speed={speed}")
-        print(f"[Scheduler] current services: {len(services)}/{self.max_concurrent}")
+        logger.debug("[Scheduler] on_new_request: room=%s, speed=%s", room_id, speed)
+        logger.debug("[Scheduler] current services: %d/%d", len(services), self.max_concurrent)
 
         if len(services) < self.max_concurrent:
-            print(f"[Scheduler] Queue not full, assigning directly")
+            logger.debug("[Scheduler] Queue not full, assigning directly")
             self.assign_service(service)
             return
 
         victim = select_victim_by_rules(services, service.speed)
-        print(f"[Scheduler] select_victim_by_rules result: {victim.room_id if victim else None}")
+        logger.debug("[Scheduler] select_victim_by_rules result: %s", victim.room_id if victim else None)
         if victim:
-            print(f"[Scheduler] Preempting: victim={victim.room_id} (speed={victim.speed})")
+            logger.debug("[Scheduler] Preempting: victim=%s (speed=%s)", victim.room_id, victim.speed)
             self.preempt(victim, service)
             return
 
         has_same_speed = any(s.speed == service.speed for s in services)
-        print(f"[Scheduler] Has same speed in service queue: {has_same_speed}")
+        logger.debug("[Scheduler] Has same speed in service queue: %s", has_same_speed)
         self._enqueue_waiting(service, time_slice_enforced=has_same_speed)
 
     def on_request(self, room_id: str, speed: str) -> None:
@@ -317,7 +337,7 @@ class Scheduler:
             room.is_serving = False
             self._save_room(room)
         
-        print(f"[Scheduler] Moved to waiting: room={service.room_id}, time_slice_enforced={time_slice_enforced}")
+        logger.debug("[Scheduler] Moved to waiting: room=%s, time_slice_enforced=%s", service.room_id, time_slice_enforced)
 
     def _fill_capacity_if_possible(self) -> None:
         """当服务队列有空位时，从等待队列提升服务"""
@@ -1,20 +1,22 @@
 """时间管理器 - 统一管理所有计时任务"""
 from __future__ import annotations
 
+import time
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Callable, Dict, Iterable, Optional, Set, TYPE_CHECKING
+from typing import Callable, ContextManager, Dict, Iterable, Optional, Set, TYPE_CHECKING
 
 from app.config import AppConfig
 from application.events import AsyncEventBus, SchedulerEvent, EventType
 from application.timer_handle import TimerHandle, TimerType
+from domain.room import TemperatureRates
 
 if TYPE_CHECKING:
     from domain.room import Room
     from infrastructure.repository import RoomRepository
 
 
-@dataclass
+@dataclass(slots=True)
 class TimerState:
     """计时器内部状态"""
     timer_id: str
@@ -50,6 +52,8 @@ class TimeManager:
     
     # tick 间隔（秒），用于控制时间流速
     _tick_interval: float = 1.0
+    # 已推进的 tick 数（用于低频检查的节拍控制）
+    _tick_counter: int = 0
     
     # 计费回调（由外部注入，避免循环依赖）
     _fee_callback: Optional[Callable[[str, str], float]] = None
@@ -58,6 +62,7 @@ class TimeManager:
     _room_lookup: Callable[[str], Optional["Room"]] = field(default=lambda room_id: None)
     _iter_rooms: Callable[[], Iterable["Room"]] = field(default=lambda: [])
     _save_room: Callable[["Room"], None] = field(default=lambda room: None)
+    _room_batch: Callable[[], ContextManager[None]] = field(default=nullcontext)
 
     def __post_init__(self) -> None:
         self._reload_config()
@@ -69,8 +74,11 @@ class TimeManager:
         """从配置加载参数"""
         temp_cfg = self.config.temperature or {}
         self.auto_restart_threshold = float(temp_cfg.get("auto_restart_threshold", 1.0))
+        self.temperature_rates = TemperatureRates.from_config(temp_cfg)
         scheduling_cfg = self.config.scheduling or {}
         self.time_slice_seconds = int(scheduling_cfg.get("time_slice_seconds", 60))
+        # 自动重启检查每 K 个 tick 执行一次（温度漂移缓慢，无需每秒扫描）
+        self.auto_restart_interval_ticks = max(1, int(scheduling_cfg.get("auto_restart_interval_ticks", 5)))
         throttle_cfg = self.config.throttle or {}
         self.throttle_ms = int(throttle_cfg.get("change_temp_ms", 1000))
 
@@ -89,6 +97,7 @@ class TimeManager:
         self._room_lookup = repo.get_room
         self._iter_rooms = repo.list_rooms
         self._save_room = repo.save_room
+        self._room_batch = repo.batch
 
     # ================== Tick 间隔控制 ==================
     def set_tick_interval(self, seconds: float) -> None:
@@ -126,6 +135,7 @@ class TimeManager:
             current_fee=0.0,
             active=True
         )
+        handle.bind_state(state)
         self._timers[handle.timer_id] = state
         self._set_room_timer(room_id, TimerType.SERVICE, handle.timer_id)
         return handle
@@ -155,6 +165,7 @@ class TimeManager:
             time_slice_enforced=time_slice_enforced,
             active=True
         )
+        handle.bind_state(state)
         self._timers[handle.timer_id] = state
         self._set_room_timer(room_id, TimerType.WAIT, handle.timer_id)
         return handle
@@ -176,6 +187,7 @@ class TimeManager:
             current_fee=0.0,
             active=True
         )
+        handle.bind_state(state)
         self._timers[handle.timer_id] = state
         self._set_room_timer(room_id, TimerType.DETAIL, handle.timer_id)
         return handle
@@ -196,6 +208,7 @@ class TimeManager:
             elapsed_seconds=0,
             active=True
         )
+        handle.bind_state(state)
         self._timers[handle.timer_id] = state
         self._set_room_timer(room_id, TimerType.ACCOMMODATION, handle.timer_id)
         return handle
@@ -212,7 +225,8 @@ class TimeManager:
             timer_id=state.timer_id,
             timer_type=state.timer_type,
             room_id=state.room_id,
-            time_manager=self
+            time_manager=self,
+            state=state,
         )
 
     def restore_timer(
@@ -240,9 +254,12 @@ class TimeManager:
             time_slice_enforced=time_slice_enforced,
             active=True
         )
+        previous = self._timers.get(timer_id)
+        if previous:
+            previous.active = False
         self._timers[timer_id] = state
         self._set_room_timer(room_id, timer_type, timer_id)
-        return TimerHandle.restore(timer_id, timer_type, room_id, self)
+        return TimerHandle.restore(timer_id, timer_type, room_id, self, state=state)
 
     # ================== 计时器查询 API ==================
     def has_timer(self, timer_id: str) -> bool:
@@ -278,6 +295,7 @@ class TimeManager:
         """取消计时器"""
         state = self._timers.pop(timer_id, None)
         if state:
+            state.active = False  # 已发放的句柄随之失效
             self._remove_room_timer(state.room_id, state.timer_type)
 
     # ================== 内部辅助方法 ==================
@@ -297,14 +315,16 @@ class TimeManager:
         if room_id in self._room_to_timer:
             timer_id = self._room_to_timer[room_id].get(timer_type)
             if timer_id:
-                self._timers.pop(timer_id, None)
+                state = self._timers.pop(timer_id, None)
+                if state:
+                    state.active = False
                 self._room_to_timer[room_id].pop(timer_type, None)
 
     def _get_active_service_rooms(self) -> Set[str]:
         """获取所有正在服务的房间ID"""
         return {
             state.room_id 
-            for state in self._timers.values() 
+            for state in list(self._timers.values())
             if state.timer_type == TimerType.SERVICE and state.active
         }
 
@@ -312,7 +332,7 @@ class TimeManager:
         """获取所有等待中的房间ID"""
         return {
             state.room_id 
-            for state in self._timers.values() 
+            for state in list(self._timers.values())
             if state.timer_type == TimerType.WAIT and state.active
         }
 
@@ -320,7 +340,7 @@ class TimeManager:
         """获取服务队列中的所有风速"""
         return {
             state.speed 
-            for state in self._timers.values() 
+            for state in list(self._timers.values())
             if state.timer_type == TimerType.SERVICE and state.active and state.speed
         }
 
@@ -331,13 +351,17 @@ class TimeManager:
         
         调用间隔由 _tick_interval 控制，通过调整间隔实现时间加速
         """
-        self._tick_service_timers()
-        self._tick_wait_timers()
-        self._tick_detail_timers()
-        self._tick_accommodation_timers()
-        self._tick_temperatures()
-        self._tick_throttle_windows()
-        self._check_auto_restart()
+        self._tick_counter += 1
+        # 本 tick 内的房间写入合并为一次提交
+        with self._room_batch():
+            self._tick_service_timers()
+            self._tick_wait_timers()
+            self._tick_detail_timers()
+            self._tick_accommodation_timers()
+            self._tick_temperatures()
+            self._tick_throttle_windows()
+            if self._tick_counter % self.auto_restart_interval_ticks == 0:
+                self._check_auto_restart()
 
     def _tick_service_timers(self) -> None:
         """推进服务计时器"""
@@ -403,13 +427,16 @@ class TimeManager:
 
     def _tick_temperatures(self) -> None:
         """推进温度模拟"""
-        temp_cfg = self.config.temperature or {}
+        rates = self.temperature_rates
         active_rooms = self._get_active_service_rooms()
         
         for room in self._iter_rooms():
             is_serving = room.room_id in active_rooms
-            reached = room.tick_temperature(temp_cfg, serving=is_serving)
-            self._save_room(room)
+            previous_temp = room.current_temp
+            reached = room.tick_temperature(rates, serving=is_serving)
+            # 已处于平衡态（到达目标/回漂到初始温度）的房间不再重复写回
+            if room.current_temp != previous_temp:
+                self._save_room(room)
             
             # 达到目标温度，发送事件
             if reached and is_serving:
@@ -420,10 +447,10 @@ class TimeManager:
 
     def _tick_throttle_windows(self) -> None:
         """应用节流窗口"""
-        now = datetime.utcnow()
+        now_ms = time.monotonic_ns() // 1_000_000
         for room in self._iter_rooms():
-            room.apply_pending_target(now, self.throttle_ms)
-            self._save_room(room)
+            if room.apply_pending_target(now_ms, self.throttle_ms):
+                self._save_room(room)
 
     def _check_auto_restart(self) -> None:
         """检查是否需要自动重启"""
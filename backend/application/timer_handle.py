@@ -1,13 +1,13 @@
 """计时任务句柄 - ServiceObject 等通过句柄查询计时状态"""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
 from uuid import uuid4
 
 if TYPE_CHECKING:
-    from application.time_manager import TimeManager
+    from application.time_manager import TimeManager, TimerState
 
 
 class TimerType(str, Enum):
@@ -18,18 +18,22 @@ class TimerType(str, Enum):
     ACCOMMODATION = "ACCOMMODATION"  # 入住计时（记录入住时长）
 
 
-@dataclass
+@dataclass(slots=True)
 class TimerHandle:
     """
     计时任务句柄
     
     ServiceObject 等持有此句柄，通过它向 TimeManager 查询计时状态。
     timer_id 可持久化到数据库，恢复时通过 TimeManager.get_timer_by_id() 重新获取句柄。
+
+    句柄直接持有对应的 TimerState 引用，读取计时数据时无需再经过
+    TimeManager 的字典查找；计时器被取消后 state.active 置为 False，句柄随之失效。
     """
     timer_id: str
     timer_type: TimerType
     room_id: str
     _time_manager: Optional["TimeManager"] = None
+    _state: Optional["TimerState"] = field(default=None, repr=False)
 
     @classmethod
     def create(
@@ -52,59 +56,74 @@ class TimerHandle:
         timer_id: str,
         timer_type: TimerType,
         room_id: str,
-        time_manager: "TimeManager"
+        time_manager: "TimeManager",
+        state: Optional["TimerState"] = None,
     ) -> "TimerHandle":
-        """从持久化数据恢复句柄"""
+        """从持久化数据恢复句柄（未传入 state 时在首次访问时查找一次）"""
         return cls(
             timer_id=timer_id,
             timer_type=timer_type,
             room_id=room_id,
-            _time_manager=time_manager
+            _time_manager=time_manager,
+            _state=state,
         )
 
     def bind_time_manager(self, time_manager: "TimeManager") -> None:
         """绑定 TimeManager（用于恢复后重新绑定）"""
         self._time_manager = time_manager
+        self._state = None
+
+    def bind_state(self, state: "TimerState") -> None:
+        """绑定计时器内部状态（由 TimeManager 在创建计时器时调用）"""
+        self._state = state
+
+    def _resolve_state(self) -> Optional["TimerState"]:
+        """返回仍处于活动状态的 TimerState，必要时向 TimeManager 查找一次"""
+        state = self._state
+        if state is None:
+            if not self._time_manager:
+                return None
+            state = self._time_manager.get_timer_state(self.timer_id)
+            if state is None:
+                return None
+            self._state = state
+        return state if state.active else None
 
     @property
     def is_valid(self) -> bool:
         """检查句柄是否仍然有效（计时器是否存在）"""
-        if not self._time_manager:
-            return False
-        return self._time_manager.has_timer(self.timer_id)
+        return self._resolve_state() is not None
 
     @property
     def elapsed_seconds(self) -> int:
         """查询已服务/已等待的秒数"""
-        if not self._time_manager:
-            return 0
-        return self._time_manager.get_elapsed_seconds(self.timer_id)
+        state = self._resolve_state()
+        return state.elapsed_seconds if state else 0
 
     @property
     def remaining_seconds(self) -> int:
         """查询剩余秒数（仅对 WAIT 类型有效）"""
-        if not self._time_manager:
-            return 0
-        return self._time_manager.get_remaining_seconds(self.timer_id)
+        state = self._resolve_state()
+        return state.remaining_seconds if state else 0
 
     @property
     def current_fee(self) -> float:
         """查询当前累计费用"""
-        if not self._time_manager:
-            return 0.0
-        return self._time_manager.get_current_fee(self.timer_id)
+        state = self._resolve_state()
+        return state.current_fee if state else 0.0
 
     @property
     def speed(self) -> Optional[str]:
         """查询计时器关联的风速"""
-        if not self._time_manager:
-            return None
-        return self._time_manager.get_timer_speed(self.timer_id)
+        state = self._resolve_state()
+        return state.speed if state else None
 
     def cancel(self) -> None:
         """取消计时任务"""
         if self._time_manager:
             self._time_manager.cancel_timer(self.timer_id)
+        elif self._state is not None:
+            self._state.active = False
 
     def __repr__(self) -> str:
         valid = self.is_valid if self._time_manager else "unbound"
@@ -1,8 +1,9 @@
 """Application service for room-side AC operations with温控模型."""
 from __future__ import annotations
 
+import time
 from datetime import datetime
-from typing import Iterable, Optional, TYPE_CHECKING
+from typing import Dict, Iterable, Optional, Tuple, TYPE_CHECKING
 
 from app.config import AppConfig
 from domain.room import Room, RoomStatus
@@ -28,12 +29,34 @@ class UseACService:
         self.repo: RoomRepository = repository or SQLiteRoomRepository()
         self.scheduler: Optional["Scheduler"] = None
         self.billing_service: BillingService = billing_service or BillingService(config, self.repo)
+        self._reload_config()
         if scheduler:
             self.attach_scheduler(scheduler)
 
     def update_config(self, config: AppConfig) -> None:
         """Refresh runtime configuration for defaults and throttling."""
         self.config = config
+        self._reload_config()
+
+    def _reload_config(self) -> None:
+        # 操作中用到的配置项在加载时解析一次，请求路径上直接读取属性
+        temp_cfg = self.config.temperature or {}
+        self._default_target = float(temp_cfg.get("default_target", 25.0))
+        accommodation_cfg = self.config.accommodation or {}
+        self._default_rate = float(accommodation_cfg.get("rate_per_night", 300.0))
+        throttle_cfg = self.config.throttle or {}
+        self._throttle_ms = int(throttle_cfg.get("change_temp_ms", 1000))
+        # 各模式允许的目标温度区间，配置加载时解析一次（未配置或格式不符的模式不做限制）
+        self._range_by_mode: Dict[str, Tuple[float, float]] = {}
+        for mode in ("cool", "heat"):
+            bounds = temp_cfg.get(f"{mode}_range") or []
+            if isinstance(bounds, (list, tuple)) and len(bounds) == 2:
+                self._range_by_mode[mode] = (float(bounds[0]), float(bounds[1]))
+
+    def target_temp_in_range(self, mode: str, target_temp: float) -> bool:
+        """目标温度是否落在该模式配置的区间内（该模式未配置区间时视为合法）。"""
+        bounds = self._range_by_mode.get(mode)
+        return bounds is None or bounds[0] <= target_temp <= bounds[1]
 
     # Infrastructure helpers ------------------------------------------------
     def attach_scheduler(self, scheduler: "Scheduler") -> None:
@@ -49,21 +72,18 @@ class UseACService:
     def _ensure_room(self, room_id: str) -> Room:
         room = self.repo.get_room(room_id)
         if not room:
-            temp_cfg = self.config.temperature or {}
-            default_target = float(temp_cfg.get("default_target", 25))
-            accommodation_cfg = self.config.accommodation or {}
-            default_rate = float(accommodation_cfg.get("rate_per_night", 300.0))
             room = Room(
                 room_id=room_id,
-                current_temp=default_target,
-                target_temp=default_target,
-                initial_temp=default_target,
-                rate_per_night=default_rate,
+                current_temp=self._default_target,
+                target_temp=self._default_target,
+                initial_temp=self._default_target,
+                rate_per_night=self._default_rate,
             )
             self.repo.save_room(room)
         return room
 
     # Public API ------------------------------------------------------------
+    # 每个操作内的房间写入在 repo.batch() 中合并，操作结束时一次性写回
     def power_on(
         self,
         room_id: str,
@@ -71,47 +91,47 @@ class UseACService:
         target_temp: Optional[float] = None,
         speed: Optional[str] = None,
     ) -> None:
-        room = self._ensure_room(room_id)
-        room.mark_occupied(initial_temp=room.current_temp)
+        with self.repo.batch():
+            room = self._ensure_room(room_id)
+            room.mark_occupied(initial_temp=room.current_temp)
 
-        temp_cfg = self.config.temperature or {}
-        default_target = float(temp_cfg.get("default_target", 25.0))
-        # 优先使用传入的 target_temp，否则每次开机都重置为配置的缺省温度
-        if target_temp is not None:
-            room.target_temp = target_temp
-        else:
-            room.target_temp = default_target
-
-        room.mode = mode or room.mode or "cool"
-        room.speed = speed or room.speed or "MID"
-        room.is_serving = False
-        room.manual_powered_off = False
-
-        self.repo.save_room(room)
-        self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
-        self._ensure_scheduler().on_new_request(room_id, room.speed)
+            # 优先使用传入的 target_temp，否则每次开机都重置为配置的缺省温度
+            if target_temp is not None:
+                room.target_temp = target_temp
+            else:
+                room.target_temp = self._default_target
+
+            room.mode = mode or room.mode or "cool"
+            room.speed = speed or room.speed or "MID"
+            room.is_serving = False
+            room.manual_powered_off = False
+
+            self.repo.save_room(room)
+            self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
+            self._ensure_scheduler().on_new_request(room_id, room.speed)
 
     def change_temp(self, room_id: str, target_temp: float) -> None:
-        room = self._ensure_room(room_id)
-        throttle_cfg = self.config.throttle or {}
-        throttle_ms = int(throttle_cfg.get("change_temp_ms", 1000))
-        now = datetime.utcnow()
-        room.request_target_temp(target_temp, now, throttle_ms)
-        self.repo.save_room(room)
+        with self.repo.batch():
+            room = self._ensure_room(room_id)
+            now_ms = time.monotonic_ns() // 1_000_000
+            room.request_target_temp(target_temp, now_ms, self._throttle_ms)
+            self.repo.save_room(room)
 
     def change_speed(self, room_id: str, speed: str) -> None:
-        room = self._ensure_room(room_id)
-        self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
-        room.speed = speed
-        self.repo.save_room(room)
-        self._ensure_scheduler().on_new_request(room_id, speed)
+        with self.repo.batch():
+            room = self._ensure_room(room_id)
+            self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
+            room.speed = speed
+            self.repo.save_room(room)
+            self._ensure_scheduler().on_new_request(room_id, speed)
 
     def power_off(self, room_id: str) -> None:
-        room = self._ensure_room(room_id)
-        room.is_serving = False
-        room.status = RoomStatus.OCCUPIED
-        room.manual_powered_off = True  # 标记空调已关闭，阻止自动重启
-        scheduler = self._ensure_scheduler()
-        self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
-        self.repo.save_room(room)
-        scheduler.cancel_request(room_id)
+        with self.repo.batch():
+            room = self._ensure_room(room_id)
+            room.is_serving = False
+            room.status = RoomStatus.OCCUPIED
+            room.manual_powered_off = True  # 标记空调已关闭，阻止自动重启
+            scheduler = self._ensure_scheduler()
+            self.billing_service.close_current_detail_record(room_id, datetime.utcnow())
+            self.repo.save_room(room)
+            scheduler.cancel_request(room_id)
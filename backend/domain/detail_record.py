@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ACDetailRecord:
     """# PPT 计费规则: 详单需要记录每一段风速/时间/费用."""
 
@@ -34,7 +34,7 @@ class ServiceQueue(ABC):
 
     @abstractmethod
     def list_all(self) -> List["ServiceObject"]:
-        """获取队列中所有服务对象（供 Scheduler 进行业务筛选）"""
+        """获取队列中所有服务对象（供 Scheduler 进行业务筛选；返回的列表只读，实现可能复用同一快照）"""
         pass
 
     @abstractmethod
@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 
 class RoomStatus(str, Enum):
@@ -12,6 +12,30 @@ class RoomStatus(str, Enum):
     OCCUPIED = "OCCUPIED"
 
 
+@dataclass(frozen=True, slots=True)
+class TemperatureRates:
+    """温度模型的每秒步长，由配置一次性换算，避免每个房间每秒重复解析配置。"""
+    speed_per_sec: Dict[str, float]
+    idle_per_sec: float
+    mid_per_sec: float  # 未知风速按中风处理
+
+    @classmethod
+    def from_config(cls, temp_config: dict) -> "TemperatureRates":
+        mid_delta = float(temp_config.get("mid_delta_per_min", 0.5))
+        high_multiplier = float(temp_config.get("high_multiplier", 1.2))
+        low_multiplier = float(temp_config.get("low_multiplier", 0.8))
+        idle_drift = float(temp_config.get("idle_drift_per_min", 0.5))
+        return cls(
+            speed_per_sec={
+                "HIGH": mid_delta * high_multiplier / 60.0,
+                "MID": mid_delta / 60.0,
+                "LOW": mid_delta * low_multiplier / 60.0,
+            },
+            idle_per_sec=idle_drift / 60.0,
+            mid_per_sec=mid_delta / 60.0,
+        )
+
+
 @dataclass
 class Room:
     room_id: str
@@ -25,7 +49,8 @@ class Room:
     total_fee: float = 0.0
     rate_per_night: float = 300.0
     active_service_id: Optional[str] = None
-    last_temp_change_timestamp: Optional[datetime] = None
+    last_temp_change_timestamp: Optional[datetime] = None  # 最近一次调温生效时间（持久化/展示用）
+    last_temp_change_ms: Optional[int] = None  # 单调时钟毫秒，仅用于调温节流判断
     pending_target_temp: Optional[float] = None
     manual_powered_off: bool = False  # 空调是否被用户开启（用于控制自动重启）
     metadata: dict = field(default_factory=dict)
@@ -43,42 +68,40 @@ class Room:
         self.is_serving = False
 
     # 温控规则（来自 PPT）：调温节流（<1s 仅采最后一次）
-    def request_target_temp(self, target: float, now: datetime, throttle_ms: int) -> bool:
+    def request_target_temp(self, target: float, now_ms: int, throttle_ms: int) -> bool:
         """
         请求修改目标温度。
 
+        now_ms 为单调时钟毫秒（time.monotonic_ns() // 1_000_000）。
         返回 True 表示本次调温已立即生效；
         返回 False 表示仍在节流窗口内，仅记录为“待应用”的最后一次调温。
         """
         self.pending_target_temp = None
-        if self.last_temp_change_timestamp:
-            delta_ms = (now - self.last_temp_change_timestamp).total_seconds() * 1000
-            if delta_ms < throttle_ms:
-                # 仍在节流窗口内：只保留最新一次调温
-                self.pending_target_temp = target
-                return False
-        self.target_temp = target
-        self.last_temp_change_timestamp = now
+        if self.last_temp_change_ms is not None and now_ms - self.last_temp_change_ms < throttle_ms:
+            # 仍在节流窗口内：只保留最新一次调温
+            self.pending_target_temp = target
+            return False
+        self._commit_target(target, now_ms)
         return True
 
     # 温控规则（来自 PPT）：节流窗口结束时应用最后一次调温
-    def apply_pending_target(self, now: datetime, throttle_ms: int) -> None:
-        """在节流时间结束后，将最后一次调温请求真正写入 target_temp。"""
+    def apply_pending_target(self, now_ms: int, throttle_ms: int) -> bool:
+        """在节流时间结束后，将最后一次调温请求真正写入 target_temp，返回是否有变更。"""
         if self.pending_target_temp is None:
-            return
-        if not self.last_temp_change_timestamp:
-            self.target_temp = self.pending_target_temp
-            self.pending_target_temp = None
-            self.last_temp_change_timestamp = now
-            return
-        delta_ms = (now - self.last_temp_change_timestamp).total_seconds() * 1000
-        if delta_ms >= throttle_ms:
-            self.target_temp = self.pending_target_temp
-            self.pending_target_temp = None
-            self.last_temp_change_timestamp = now
+            return False
+        if self.last_temp_change_ms is not None and now_ms - self.last_temp_change_ms < throttle_ms:
+            return False
+        self._commit_target(self.pending_target_temp, now_ms)
+        self.pending_target_temp = None
+        return True
+
+    def _commit_target(self, target: float, now_ms: int) -> None:
+        self.target_temp = target
+        self.last_temp_change_ms = now_ms
+        self.last_temp_change_timestamp = datetime.utcnow()
 
     # 温控规则（来自 PPT）：按秒推进温度模型
-    def tick_temperature(self, temp_config: dict, *, serving: bool) -> bool:
+    def tick_temperature(self, rates: TemperatureRates, *, serving: bool) -> bool:
         """
         每秒推进一次温度。
 
@@ -91,24 +114,12 @@ class Room:
         在非送风/等待状态下：
         - 以 idle_drift_per_min 值向 initial_temp 漂移。
         """
-        mid_delta = float(temp_config.get("mid_delta_per_min", 0.5))
-        high_multiplier = float(temp_config.get("high_multiplier", 1.2))
-        low_multiplier = float(temp_config.get("low_multiplier", 0.8))
-        idle_drift = float(temp_config.get("idle_drift_per_min", 0.5))
-
         if serving:
-            multiplier = 1.0
-            if self.speed == "HIGH":
-                multiplier = high_multiplier
-            elif self.speed == "LOW":
-                multiplier = low_multiplier
-            delta_per_sec = (mid_delta * multiplier) / 60.0
-            reached = self._move_towards(self.target_temp, delta_per_sec)
-            return reached
+            delta_per_sec = rates.speed_per_sec.get(self.speed, rates.mid_per_sec)
+            return self._move_towards(self.target_temp, delta_per_sec)
 
         # 非送风 / 等待：向初始温度回漂
-        delta_per_sec = idle_drift / 60.0
-        self._move_towards(self.initial_temp, delta_per_sec)
+        self._move_towards(self.initial_temp, rates.idle_per_sec)
         return False
 
     # 温控规则（来自 PPT）：偏离 ≥ 阈值时自动重启
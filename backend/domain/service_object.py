@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Tuple, TYPE_CHECKING
+from typing import NamedTuple, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from application.timer_handle import TimerHandle
@@ -20,7 +20,18 @@ class ServiceStatus(str, Enum):
 SPEED_PRIORITY = {"HIGH": 3, "MID": 2, "LOW": 1}
 
 
-@dataclass
+class TimerSnapshot(NamedTuple):
+    """一次读取的全部计时数据"""
+    served_seconds: int
+    wait_seconds: int
+    total_waited_seconds: int
+    current_fee: float
+
+
+_EMPTY_SNAPSHOT = TimerSnapshot(0, 0, 0, 0.0)
+
+
+@dataclass(slots=True)
 class ServiceObject:
     """服务会话对象，表示一个空调服务请求的生命周期"""
     room_id: str
@@ -36,6 +47,12 @@ class ServiceObject:
     # TimerHandle 实例（不持久化，运行时绑定）
     _timer_handle: Optional["TimerHandle"] = field(default=None, repr=False)
 
+    # 风速优先级（由 speed 派生；服务对象创建后风速不再变化，构造时查表一次）
+    speed_priority: int = field(init=False, default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        self.speed_priority = SPEED_PRIORITY.get(self.speed, 0)
+
     # ================== 计时相关属性（通过 TimerHandle 查询）==================
     @property
     def served_seconds(self) -> int:
@@ -65,6 +82,14 @@ class ServiceObject:
             return self._timer_handle.current_fee
         return 0.0
 
+    def timer_snapshot(self) -> TimerSnapshot:
+        """一次性读取全部计时数据（只做一次句柄有效性检查，供需要多个字段的调用方使用）"""
+        handle = self._timer_handle
+        if not handle or not handle.is_valid:
+            return _EMPTY_SNAPSHOT
+        elapsed = handle.elapsed_seconds
+        return TimerSnapshot(elapsed, handle.remaining_seconds, elapsed, handle.current_fee)
+
     # ================== 计时任务管理 ==================
     def attach_timer(self, handle: "TimerHandle") -> None:
         """绑定计时任务句柄"""
@@ -97,7 +122,7 @@ class ServiceObject:
         优先级规则：风速优先级 > 优先级令牌 > 等待时长
         """
         return (
-            SPEED_PRIORITY.get(self.speed, 0),
+            self.speed_priority,
             self.priority_token,
             self.total_waited_seconds,
         )
@@ -2,7 +2,14 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+from contextlib import closing, contextmanager
 from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel, create_engine, Session
 
 DB_PATH = Path(__file__).resolve().parent.parent / "ac_system.db"
@@ -14,28 +21,127 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
 )
 
+# 每个新连接都启用 WAL：读连接（连接池）与单写连接互不阻塞
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+# 写事务串行化，避免多个写者争用 SQLite 写锁导致 SQLITE_BUSY 重试
+_write_lock = threading.Lock()
+# 当前线程所处 write_transaction() 的共享会话
+_write_local = threading.local()
 
-def _ensure_rate_column() -> None:
-    """Add rate_per_night column if database pre-dates the field."""
-    if not DB_PATH.exists():
-        return
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("PRAGMA table_info(roommodel)")
-        columns = {row[1] for row in cursor.fetchall()}
-        if "rate_per_night" not in columns:
-            conn.execute("ALTER TABLE roommodel ADD COLUMN rate_per_night FLOAT DEFAULT 300.0")
-            conn.commit()
+# 旧库补丁全部完成后写入 PRAGMA user_version，之后启动只读这一个整数
+_SCHEMA_VERSION = 1
+
+
+# 旧库补丁：(表, 列, 列定义)，新增的缺列补丁追加到这里并递增 _SCHEMA_VERSION
+_LEGACY_COLUMNS = (
+    ("roommodel", "rate_per_night", "FLOAT DEFAULT 300.0"),
+)
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """Add columns missing from databases that pre-date the current models."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+        return
+    statements = []
+    for table, column, definition in _LEGACY_COLUMNS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        # 表尚不存在时交给 create_all 按当前模型建表
+        if columns and column not in columns:
+            statements.append(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    statements.append(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+    # 全部补丁在同一个事务中执行，只提交一次
+    conn.executescript("BEGIN; " + "; ".join(statements) + "; COMMIT;")
 
 
 def init_db() -> None:
     """Create tables if they do not exist and patch legacy schemas."""
     from . import models  # noqa: F401  # ensure SQLModel metadata is loaded
 
-    _ensure_rate_column()
+    if DB_PATH.exists():
+        with closing(sqlite3.connect(DB_PATH)) as conn:
+            _ensure_schema(conn)
     SQLModel.metadata.create_all(engine)
+    # create_all 不会给已存在的表补建新索引
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+# 会话用完即关，提交后不再访问模型属性，无需在提交时使全部实例过期
+_session_factory = sessionmaker(engine, class_=Session, expire_on_commit=False)
 
 
 def SessionLocal() -> Session:
-    return Session(engine)
+    return _session_factory()
+
+
+@contextmanager
+def ReadSession() -> Iterator[Session]:
+    """Open a session for repository reads.
+
+    Inside write_transaction() the thread's shared session is reused, so reads
+    see the operation's own uncommitted writes (a pooled connection would not).
+    """
+    session = getattr(_write_local, "session", None)
+    if session is not None:
+        yield session
+        return
+    with SessionLocal() as session:
+        yield session
+
+
+@contextmanager
+def WriteSession() -> Iterator[Session]:
+    """Open a session inside a write transaction, holding the single-writer lock.
+
+    Inside write_transaction() the thread's shared session is reused, so the
+    write joins the surrounding transaction instead of committing on its own.
+    """
+    session = getattr(_write_local, "session", None)
+    if session is not None:
+        yield session
+        return
+    with _write_lock, _session_factory() as session, session.begin():
+        yield session
+
+
+@contextmanager
+def write_transaction() -> Iterator[None]:
+    """Coalesce every WriteSession on this thread into one transaction and one commit."""
+    if getattr(_write_local, "session", None) is not None:
+        yield
+        return
+    with _write_lock, _session_factory() as session, session.begin():
+        _write_local.session = session
+        try:
+            yield
+        finally:
+            _write_local.session = None
+
+
+def upsert(model: SQLModel):
+    """按主键 room_id 插入或覆盖整行（SQLite UPSERT），替代 merge 的先查后写"""
+    values = model.model_dump()
+    statement = sqlite_insert(type(model)).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=["room_id"],
+        set_={key: statement.excluded[key] for key in values if key != "room_id"},
+    )
@@ -1,7 +1,8 @@
 """内存队列实现，速度最快，但服务重启后数据丢失。"""
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from itertools import count
+from typing import Dict, List, Optional, Tuple
 
 from domain.queues import ServiceQueue, WaitingQueue
 from domain.service_object import ServiceObject
@@ -12,27 +13,41 @@ class InMemoryServiceQueue(ServiceQueue):
 
     def __init__(self) -> None:
         self._data: Dict[str, ServiceObject] = {}
+        # list_all() 的缓存快照（调度器每次决策都会读取），按版本号失效；
+        # 版本号取自 itertools.count，多线程下递增不会丢失
+        self._versions = count(1)
+        self._version = 0
+        self._view: Tuple[int, List[ServiceObject]] = (0, [])
 
     def add(self, service: ServiceObject) -> None:
         self._data[service.room_id] = service
+        self._version = next(self._versions)
 
     def remove(self, room_id: str) -> None:
-        self._data.pop(room_id, None)
+        if self._data.pop(room_id, None) is not None:
+            self._version = next(self._versions)
 
     def get(self, room_id: str) -> Optional[ServiceObject]:
         return self._data.get(room_id)
 
     def list_all(self) -> List[ServiceObject]:
-        return list(self._data.values())
+        version = self._version
+        view_version, view = self._view
+        if view_version != version:
+            view = list(self._data.values())
+            self._view = (version, view)
+        return view
 
     def update(self, service: ServiceObject) -> None:
         self._data[service.room_id] = service
+        self._version = next(self._versions)
 
     def size(self) -> int:
         return len(self._data)
 
     def clear(self) -> None:
         self._data.clear()
+        self._version = next(self._versions)
 
 
 class InMemoryWaitingQueue(WaitingQueue):
@@ -40,25 +55,39 @@ class InMemoryWaitingQueue(WaitingQueue):
 
     def __init__(self) -> None:
         self._data: Dict[str, ServiceObject] = {}
+        # list_all() 的缓存快照（调度器每次决策都会读取），按版本号失效；
+        # 版本号取自 itertools.count，多线程下递增不会丢失
+        self._versions = count(1)
+        self._version = 0
+        self._view: Tuple[int, List[ServiceObject]] = (0, [])
 
     def add(self, service: ServiceObject) -> None:
         self._data[service.room_id] = service
+        self._version = next(self._versions)
 
     def remove(self, room_id: str) -> None:
-        self._data.pop(room_id, None)
+        if self._data.pop(room_id, None) is not None:
+            self._version = next(self._versions)
 
     def get(self, room_id: str) -> Optional[ServiceObject]:
         return self._data.get(room_id)
 
     def list_all(self) -> List[ServiceObject]:
-        return list(self._data.values())
+        version = self._version
+        view_version, view = self._view
+        if view_version != version:
+            view = list(self._data.values())
+            self._view = (version, view)
+        return view
 
     def update(self, service: ServiceObject) -> None:
         self._data[service.room_id] = service
+        self._version = next(self._versions)
 
     def size(self) -> int:
         return len(self._data)
 
     def clear(self) -> None:
         self._data.clear()
+        self._version = next(self._versions)
 
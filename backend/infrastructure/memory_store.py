@@ -1,7 +1,8 @@
 """In-memory data store intended for the prototype stage."""
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+import threading
+from typing import ContextManager, Dict, Iterable, List, Optional, TYPE_CHECKING
 
 from domain.room import Room
 from domain.detail_record import ACDetailRecord
@@ -19,9 +20,13 @@ class InMemoryRoomRepository(RoomRepository):
         self._wait_entries: Dict[str, "ServiceObject"] = {}
         self._detail_records: Dict[str, ACDetailRecord] = {}
         self._room_detail_history: Dict[str, List[str]] = {}
+        # room_id -> 未结束详单的 record_id（详单分段保证每个房间至多一条未结束记录）
+        self._active_detail: Dict[str, str] = {}
         self._ac_bills: Dict[str, List[ACBill]] = {}
         self._accommodation_orders: List[dict] = []
         self._accommodation_bills: List[dict] = []
+        # tick 与调度处理器在不同线程中运行，batch() 以可重入锁串行化各操作
+        self._batch_lock = threading.RLock()
 
     def get_room(self, room_id: str) -> Optional[Room]:
         return self._rooms.get(room_id)
@@ -32,6 +37,9 @@ class InMemoryRoomRepository(RoomRepository):
     def save_room(self, room: Room) -> None:
         self._rooms[room.room_id] = room
 
+    def batch(self) -> ContextManager[None]:
+        return self._batch_lock
+
     def add_service_object(self, service: "ServiceObject") -> None:
         self._services[service.room_id] = service
 
@@ -53,17 +61,22 @@ class InMemoryRoomRepository(RoomRepository):
     def add_detail_record(self, record: ACDetailRecord) -> None:
         self._detail_records[record.record_id] = record
         self._room_detail_history.setdefault(record.room_id, []).append(record.record_id)
+        if record.ended_at is None:
+            self._active_detail[record.room_id] = record.record_id
 
     def update_detail_record(self, record: ACDetailRecord) -> None:
         self._detail_records[record.record_id] = record
+        if record.ended_at is None:
+            self._active_detail[record.room_id] = record.record_id
+        elif self._active_detail.get(record.room_id) == record.record_id:
+            self._active_detail.pop(record.room_id, None)
 
     def get_active_detail_record(self, room_id: str) -> Optional[ACDetailRecord]:
-        ids = self._room_detail_history.get(room_id, [])
-        for record_id in reversed(ids):
-            record = self._detail_records[record_id]
-            if record.ended_at is None:
-                return record
-        return None
+        record_id = self._active_detail.get(room_id)
+        if record_id is None:
+            return None
+        record = self._detail_records[record_id]
+        return record if record.ended_at is None else None
 
     def list_completed_detail_records(self, room_id: str) -> Iterable[ACDetailRecord]:
         ids = self._room_detail_history.get(room_id, [])
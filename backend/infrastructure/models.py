@@ -4,6 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
@@ -50,8 +51,14 @@ class WaitEntryModel(SQLModel, table=True):
 
 
 class ACDetailRecordModel(SQLModel, table=True):
+    # 详单查询均按房间过滤：未结束/已结束（ended_at）与按开始时间排序、范围筛选（started_at）
+    __table_args__ = (
+        Index("ix_acdetailrecordmodel_room_id_ended_at", "room_id", "ended_at"),
+        Index("ix_acdetailrecordmodel_room_id_started_at", "room_id", "started_at"),
+    )
+
     record_id: str = Field(primary_key=True)
-    room_id: str = Field(index=True)
+    room_id: str
     speed: str
     started_at: datetime
     ended_at: Optional[datetime] = None
@@ -63,14 +70,19 @@ class ACDetailRecordModel(SQLModel, table=True):
 class ACBillModel(SQLModel, table=True):
     bill_id: str = Field(primary_key=True)
     room_id: str = Field(index=True)
-    period_start: datetime
+    period_start: datetime = Field(index=True)
     period_end: datetime
     total_fee: float = 0.0
 
 
 class AccommodationOrderModel(SQLModel, table=True):
+    # 按房间取最近一次入住（ORDER BY check_in_at DESC / MAX(check_in_at) GROUP BY room_id）
+    __table_args__ = (
+        Index("ix_accommodationordermodel_room_id_check_in_at", "room_id", "check_in_at"),
+    )
+
     order_id: str = Field(primary_key=True)
-    room_id: str = Field(index=True)
+    room_id: str
     customer_name: str
     nights: int
     deposit: float
@@ -79,7 +91,12 @@ class AccommodationOrderModel(SQLModel, table=True):
 
 
 class AccommodationBillModel(SQLModel, table=True):
+    # 按房间取最近一张住宿账单（ORDER BY created_at DESC）
+    __table_args__ = (
+        Index("ix_accommodationbillmodel_room_id_created_at", "room_id", "created_at"),
+    )
+
     bill_id: str = Field(primary_key=True)
-    room_id: str = Field(index=True)
+    room_id: str
     total_fee: float
     created_at: datetime
@@ -2,7 +2,8 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Iterable, Optional, TYPE_CHECKING
+from contextlib import nullcontext
+from typing import ContextManager, Iterable, Optional, TYPE_CHECKING
 
 from domain.room import Room
 
@@ -27,6 +28,13 @@ class RoomRepository(ABC):
     def save_room(self, room: Room) -> None:
         raise NotImplementedError
 
+    def batch(self) -> ContextManager[None]:
+        """Defer room writes made inside the block and flush them together on exit.
+
+        Implementations without per-write I/O cost may keep this default no-op.
+        """
+        return nullcontext()
+
     # Service queue -------------------------------------------------------
     @abstractmethod
     def add_service_object(self, service: "ServiceObject") -> None:
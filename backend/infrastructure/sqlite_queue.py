@@ -1,73 +1,81 @@
 """SQLite 队列实现，支持数据持久化，服务重启后可恢复状态。"""
 from __future__ import annotations
 
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 
+from sqlalchemy import delete
 from sqlmodel import select
 
 from domain.queues import ServiceQueue, WaitingQueue
 from domain.service_object import ServiceObject, ServiceStatus
-from .database import SessionLocal
+from .database import ReadSession, WriteSession, upsert
 from .models import ServiceObjectModel, WaitEntryModel
 
 
 class SQLiteServiceQueue(ServiceQueue):
     """服务队列的 SQLite 实现"""
 
+    def __init__(self) -> None:
+        # 内存镜像（按 room_id 索引）：读操作直接命中，写操作同步落库；
+        # 与内存队列一样返回同一对象，保留运行时绑定的 TimerHandle
+        self._data: Optional[Dict[str, ServiceObject]] = None
+        self._load_lock = threading.Lock()
+
     def add(self, service: ServiceObject) -> None:
-        with SessionLocal() as session:
-            model = self._to_model(service)
-            session.merge(model)
-            session.commit()
+        self._entries()[service.room_id] = service
+        statement = upsert(self._to_model(service))
+        with WriteSession() as session:
+            session.exec(statement)
 
     def remove(self, room_id: str) -> None:
-        with SessionLocal() as session:
-            model = session.get(ServiceObjectModel, room_id)
-            if model:
-                session.delete(model)
-                session.commit()
+        if self._entries().pop(room_id, None) is None:
+            return
+        with WriteSession() as session:
+            session.exec(delete(ServiceObjectModel).where(ServiceObjectModel.room_id == room_id))
 
     def get(self, room_id: str) -> Optional[ServiceObject]:
-        with SessionLocal() as session:
-            model = session.get(ServiceObjectModel, room_id)
-            return self._to_entity(model) if model else None
+        return self._entries().get(room_id)
 
     def list_all(self) -> List[ServiceObject]:
-        with SessionLocal() as session:
-            models = session.exec(select(ServiceObjectModel)).all()
-            return [self._to_entity(m) for m in models]
+        return list(self._entries().values())
 
     def update(self, service: ServiceObject) -> None:
-        self.add(service)  # merge 会自动处理更新
+        self.add(service)  # UPSERT 会自动处理更新
 
     def size(self) -> int:
-        with SessionLocal() as session:
-            models = session.exec(select(ServiceObjectModel)).all()
-            return len(models)
+        return len(self._entries())
 
     def clear(self) -> None:
-        with SessionLocal() as session:
-            models = session.exec(select(ServiceObjectModel)).all()
-            for model in models:
-                session.delete(model)
-            session.commit()
+        self._data = {}
+        with WriteSession() as session:
+            session.exec(delete(ServiceObjectModel))
+
+    def _entries(self) -> Dict[str, ServiceObject]:
+        """首次访问时从数据库加载镜像"""
+        if self._data is None:
+            with self._load_lock:
+                if self._data is None:
+                    with ReadSession() as session:
+                        models = session.exec(select(ServiceObjectModel)).all()
+                        self._data = {m.room_id: self._to_entity(m) for m in models}
+        return self._data
 
     def _to_model(self, service: ServiceObject) -> ServiceObjectModel:
         # 从 TimerHandle 获取实时数据（如果有绑定的话）
-        served_seconds = service.served_seconds
-        current_fee = service.current_fee
+        snapshot = service.timer_snapshot()
         
         return ServiceObjectModel(
             room_id=service.room_id,
             speed=service.speed,
             started_at=service.started_at,
-            served_seconds=served_seconds,
-            wait_seconds=service.wait_seconds,
-            total_waited_seconds=service.total_waited_seconds,
+            served_seconds=snapshot.served_seconds,
+            wait_seconds=snapshot.wait_seconds,
+            total_waited_seconds=snapshot.total_waited_seconds,
             priority_token=service.priority_token,
             time_slice_enforced=service.time_slice_enforced,
             status=service.status.value if isinstance(service.status, ServiceStatus) else service.status,
-            current_fee=current_fee,
+            current_fee=snapshot.current_fee,
             timer_id=service.timer_id,  # 持久化 timer_id
         )
 
@@ -87,54 +95,60 @@ class SQLiteServiceQueue(ServiceQueue):
 class SQLiteWaitingQueue(WaitingQueue):
     """等待队列的 SQLite 实现"""
 
+    def __init__(self) -> None:
+        # 内存镜像（按 room_id 索引）：读操作直接命中，写操作同步落库；
+        # 与内存队列一样返回同一对象，保留运行时绑定的 TimerHandle
+        self._data: Optional[Dict[str, ServiceObject]] = None
+        self._load_lock = threading.Lock()
+
     def add(self, service: ServiceObject) -> None:
-        with SessionLocal() as session:
-            model = self._to_model(service)
-            session.merge(model)
-            session.commit()
+        self._entries()[service.room_id] = service
+        statement = upsert(self._to_model(service))
+        with WriteSession() as session:
+            session.exec(statement)
 
     def remove(self, room_id: str) -> None:
-        with SessionLocal() as session:
-            model = session.get(WaitEntryModel, room_id)
-            if model:
-                session.delete(model)
-                session.commit()
+        if self._entries().pop(room_id, None) is None:
+            return
+        with WriteSession() as session:
+            session.exec(delete(WaitEntryModel).where(WaitEntryModel.room_id == room_id))
 
     def get(self, room_id: str) -> Optional[ServiceObject]:
-        with SessionLocal() as session:
-            model = session.get(WaitEntryModel, room_id)
-            return self._to_entity(model) if model else None
+        return self._entries().get(room_id)
 
     def list_all(self) -> List[ServiceObject]:
-        with SessionLocal() as session:
-            models = session.exec(select(WaitEntryModel)).all()
-            return [self._to_entity(m) for m in models]
+        return list(self._entries().values())
 
     def update(self, service: ServiceObject) -> None:
-        self.add(service)  # merge 会自动处理更新
+        self.add(service)  # UPSERT 会自动处理更新
 
     def size(self) -> int:
-        with SessionLocal() as session:
-            models = session.exec(select(WaitEntryModel)).all()
-            return len(models)
+        return len(self._entries())
 
     def clear(self) -> None:
-        with SessionLocal() as session:
-            models = session.exec(select(WaitEntryModel)).all()
-            for model in models:
-                session.delete(model)
-            session.commit()
+        self._data = {}
+        with WriteSession() as session:
+            session.exec(delete(WaitEntryModel))
+
+    def _entries(self) -> Dict[str, ServiceObject]:
+        """首次访问时从数据库加载镜像"""
+        if self._data is None:
+            with self._load_lock:
+                if self._data is None:
+                    with ReadSession() as session:
+                        models = session.exec(select(WaitEntryModel)).all()
+                        self._data = {m.room_id: self._to_entity(m) for m in models}
+        return self._data
 
     def _to_model(self, service: ServiceObject) -> WaitEntryModel:
         # 从 TimerHandle 获取实时数据（如果有绑定的话）
-        wait_seconds = service.wait_seconds
-        total_waited_seconds = service.total_waited_seconds
+        snapshot = service.timer_snapshot()
         
         return WaitEntryModel(
             room_id=service.room_id,
             speed=service.speed,
-            wait_seconds=wait_seconds,
-            total_waited_seconds=total_waited_seconds,
+            wait_seconds=snapshot.wait_seconds,
+            total_waited_seconds=snapshot.total_waited_seconds,
             priority_token=service.priority_token,
             time_slice_enforced=service.time_slice_enforced,
             timer_id=service.timer_id,  # 持久化 timer_id
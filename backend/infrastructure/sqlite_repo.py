@@ -1,15 +1,19 @@
 """SQLite-backed repository implementation."""
 from __future__ import annotations
 
-from typing import Iterable, List, Optional, TYPE_CHECKING
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, TYPE_CHECKING
 
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import select
 
 from domain.room import Room, RoomStatus
 from domain.detail_record import ACDetailRecord
 from domain.bill import ACBill
 from .repository import RoomRepository
-from .database import SessionLocal, init_db
+from .database import ReadSession, WriteSession, init_db, upsert, write_transaction
 from .models import (
     RoomModel,
     ServiceObjectModel,
@@ -24,52 +28,119 @@ if TYPE_CHECKING:  # pragma: no cover
     from domain.service_object import ServiceObject
 
 
+# 房间写回语句只构建一次；SQLAlchemy 缓存其编译结果，sqlite3 按连接缓存预编译语句
+_room_insert = sqlite_insert(RoomModel)
+_ROOM_UPSERT = _room_insert.on_conflict_do_update(
+    index_elements=[RoomModel.room_id],
+    set_={
+        column.name: _room_insert.excluded[column.name]
+        for column in RoomModel.__table__.columns
+        if column.name != "room_id"
+    },
+)
+
+
+# 按房间查询详单的语句同样只构建一次，room_id 以绑定参数传入
+_ACTIVE_DETAIL_STMT = (
+    select(ACDetailRecordModel)
+    .where(ACDetailRecordModel.room_id == bindparam("room_id"))
+    .where(ACDetailRecordModel.ended_at.is_(None))
+    .order_by(ACDetailRecordModel.started_at.desc())
+)
+_COMPLETED_DETAILS_STMT = (
+    select(ACDetailRecordModel)
+    .where(ACDetailRecordModel.room_id == bindparam("room_id"))
+    .where(ACDetailRecordModel.ended_at.is_not(None))
+)
+
+# 建表/补丁每个进程只需执行一次，之后再创建仓储实例不再检查数据库结构
+_db_initialized = False
+
+
 class SQLiteRoomRepository(RoomRepository):
+    """SQLite 仓储。
+
+    房间对象在进程内缓存（所有房间读写都经过本仓储，缓存与数据库保持一致），
+    get_room / list_rooms 命中缓存时不再访问 SQLite；在 batch() 块内的
+    save_room 只标记脏数据，退出时统一写回，且块内的其它写入与之共用一个事务。
+    """
+
     def __init__(self):
-        init_db()
+        global _db_initialized
+        if not _db_initialized:
+            init_db()
+            _db_initialized = True
+        self._room_cache: Dict[str, Room] = {}
+        self._rooms_loaded = False
+        # 每个线程独立的脏房间集合（None 表示当前不在 batch 块内）
+        self._local = threading.local()
 
     # Rooms ----------------------------------------------------------------
     def get_room(self, room_id: str) -> Optional[Room]:
-        with SessionLocal() as session:
+        room = self._room_cache.get(room_id)
+        if room is not None:
+            return room
+        with ReadSession() as session:
             model = session.get(RoomModel, room_id)
             if not model:
                 return None
-            return self._room_from_model(model)
+            room = self._room_from_model(model)
+        return self._room_cache.setdefault(room_id, room)
 
     def list_rooms(self) -> Iterable[Room]:
-        with SessionLocal() as session:
-            models = session.exec(select(RoomModel)).all()
-            for model in models:
-                yield self._room_from_model(model)
+        if not self._rooms_loaded:
+            with ReadSession() as session:
+                for model in session.exec(select(RoomModel)).all():
+                    self._room_cache.setdefault(model.room_id, self._room_from_model(model))
+            self._rooms_loaded = True
+        return list(self._room_cache.values())
 
     def save_room(self, room: Room) -> None:
-        with SessionLocal() as session:
-            with session.begin():
-                model = session.get(RoomModel, room.room_id)
-                if not model:
-                    model = RoomModel(room_id=room.room_id)
-                model.status = room.status.value
-                model.current_temp = room.current_temp
-                model.target_temp = room.target_temp
-                model.initial_temp = room.initial_temp
-                model.mode = room.mode
-                model.speed = room.speed
-                model.is_serving = room.is_serving
-                model.total_fee = room.total_fee
-                model.rate_per_night = room.rate_per_night
-                model.active_service_id = room.active_service_id
-                model.last_temp_change_timestamp = room.last_temp_change_timestamp
-                model.pending_target_temp = room.pending_target_temp
-                model.manual_powered_off = room.manual_powered_off
-                session.add(model)
+        self._room_cache[room.room_id] = room
+        dirty = getattr(self._local, "dirty", None)
+        if dirty is not None:
+            dirty[room.room_id] = room
+            return
+        self._write_rooms([room])
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if getattr(self._local, "dirty", None) is not None:
+            # 嵌套 batch：由最外层统一写回
+            yield
+            return
+        # 块内的所有写入（房间写回、详单、队列）合并为同一个写事务，只提交一次
+        with write_transaction():
+            dirty: Dict[str, Room] = {}
+            self._local.dirty = dirty
+            try:
+                yield
+                if dirty:
+                    self._write_rooms(dirty.values())
+            except BaseException:
+                # 出错时事务整体回滚：把块内改过的房间从缓存中剔除，下次读取时
+                # 从数据库重新加载。队列镜像、计时器和计费服务中的运行时状态
+                # 不随事务回滚，可能与数据库短暂不一致
+                for room_id in dirty:
+                    self._room_cache.pop(room_id, None)
+                if dirty:
+                    self._rooms_loaded = False
+                raise
+            finally:
+                self._local.dirty = None
+
+    def _write_rooms(self, rooms: Iterable[Room]) -> None:
+        rows = [self._room_row(room) for room in rooms]
+        with WriteSession() as session:
+            session.execute(_ROOM_UPSERT, rows)
 
     # Service objects ------------------------------------------------------
     def add_service_object(self, service: "ServiceObject") -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             session.add(self._service_model_from_service(service))
 
     def update_service_object(self, service: "ServiceObject") -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = session.get(ServiceObjectModel, service.room_id)
             if not model:
                 model = self._service_model_from_service(service)
@@ -78,38 +149,40 @@ class SQLiteRoomRepository(RoomRepository):
             session.add(model)
 
     def remove_service_object(self, room_id: str) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = session.get(ServiceObjectModel, room_id)
             if model:
                 session.delete(model)
 
     # Waiting queue -------------------------------------------------------
     def add_wait_entry(self, service: "ServiceObject") -> None:
-        with SessionLocal() as session, session.begin():
-            model = WaitEntryModel(
+        snapshot = service.timer_snapshot()
+        statement = upsert(
+            WaitEntryModel(
                 room_id=service.room_id,
                 speed=service.speed,
-                wait_seconds=service.wait_seconds,
-                total_waited_seconds=service.total_waited_seconds,
+                wait_seconds=snapshot.wait_seconds,
+                total_waited_seconds=snapshot.total_waited_seconds,
                 priority_token=service.priority_token,
             )
-            session.merge(model)
+        )
+        with WriteSession() as session:
+            session.exec(statement)
 
     def remove_wait_entry(self, room_id: str) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = session.get(WaitEntryModel, room_id)
             if model:
                 session.delete(model)
 
-    def list_wait_entries(self) -> Iterable["ServiceObject"]:
-        with SessionLocal() as session:
+    def list_wait_entries(self) -> List["ServiceObject"]:
+        with ReadSession() as session:
             models = session.exec(select(WaitEntryModel)).all()
-            for model in models:
-                yield self._service_object_from_wait(model)
+        return [self._service_object_from_wait(model) for model in models]
 
     # Billing --------------------------------------------------------------
     def add_detail_record(self, record: ACDetailRecord) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = ACDetailRecordModel(
                 record_id=record.record_id,
                 room_id=record.room_id,
@@ -123,7 +196,7 @@ class SQLiteRoomRepository(RoomRepository):
             session.add(model)
 
     def update_detail_record(self, record: ACDetailRecord) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = session.get(ACDetailRecordModel, record.record_id)
             if not model:
                 model = ACDetailRecordModel(record_id=record.record_id, room_id=record.room_id)
@@ -136,31 +209,19 @@ class SQLiteRoomRepository(RoomRepository):
             session.add(model)
 
     def get_active_detail_record(self, room_id: str) -> Optional[ACDetailRecord]:
-        with SessionLocal() as session:
-            statement = (
-                select(ACDetailRecordModel)
-                .where(ACDetailRecordModel.room_id == room_id)
-                .where(ACDetailRecordModel.ended_at.is_(None))
-                .order_by(ACDetailRecordModel.started_at.desc())
-            )
-            model = session.exec(statement).first()
+        with ReadSession() as session:
+            model = session.exec(_ACTIVE_DETAIL_STMT, params={"room_id": room_id}).first()
             if not model:
                 return None
             return self._detail_from_model(model)
 
-    def list_completed_detail_records(self, room_id: str) -> Iterable[ACDetailRecord]:
-        with SessionLocal() as session:
-            statement = (
-                select(ACDetailRecordModel)
-                .where(ACDetailRecordModel.room_id == room_id)
-                .where(ACDetailRecordModel.ended_at.is_not(None))
-            )
-            models = session.exec(statement).all()
-            for model in models:
-                yield self._detail_from_model(model)
+    def list_completed_detail_records(self, room_id: str) -> List[ACDetailRecord]:
+        with ReadSession() as session:
+            models = session.exec(_COMPLETED_DETAILS_STMT, params={"room_id": room_id}).all()
+        return [self._detail_from_model(model) for model in models]
 
     def add_ac_bill(self, bill: ACBill) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             model = ACBillModel(
                 bill_id=bill.bill_id,
                 room_id=bill.room_id,
@@ -170,30 +231,40 @@ class SQLiteRoomRepository(RoomRepository):
             )
             session.add(model)
 
-    def list_ac_bills(self, room_id: str) -> Iterable[ACBill]:
-        with SessionLocal() as session:
+    def list_ac_bills(self, room_id: str) -> List[ACBill]:
+        with ReadSession() as session:
             statement = select(ACBillModel).where(ACBillModel.room_id == room_id)
             models = session.exec(statement).all()
-            for model in models:
-                details_stmt = (
-                    select(ACDetailRecordModel)
-                    .where(ACDetailRecordModel.room_id == room_id)
-                    .where(ACDetailRecordModel.started_at >= model.period_start)
-                    .where(ACDetailRecordModel.ended_at <= model.period_end)
-                )
-                detail_models = session.exec(details_stmt).all()
-                yield ACBill(
-                    bill_id=model.bill_id,
-                    room_id=model.room_id,
-                    period_start=model.period_start,
-                    period_end=model.period_end,
-                    total_fee=model.total_fee,
-                    details=[self._detail_from_model(detail) for detail in detail_models],
-                )
+            if not models:
+                return []
+            # 一次取出覆盖全部账单周期的详单，再按周期分配，避免每张账单一次查询
+            details_stmt = (
+                select(ACDetailRecordModel)
+                .where(ACDetailRecordModel.room_id == room_id)
+                .where(ACDetailRecordModel.started_at >= min(model.period_start for model in models))
+                .where(ACDetailRecordModel.ended_at <= max(model.period_end for model in models))
+                .order_by(ACDetailRecordModel.started_at)
+            )
+            details = [self._detail_from_model(detail) for detail in session.exec(details_stmt).all()]
+        return [
+            ACBill(
+                bill_id=model.bill_id,
+                room_id=model.room_id,
+                period_start=model.period_start,
+                period_end=model.period_end,
+                total_fee=model.total_fee,
+                details=[
+                    detail
+                    for detail in details
+                    if detail.started_at >= model.period_start and detail.ended_at <= model.period_end
+                ],
+            )
+            for model in models
+        ]
 
     # Accommodation -------------------------------------------------------
     def add_accommodation_order(self, order: dict) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             session.add(
                 AccommodationOrderModel(
                     order_id=order["order_id"],
@@ -207,7 +278,7 @@ class SQLiteRoomRepository(RoomRepository):
             )
 
     def get_latest_accommodation_order(self, room_id: str) -> Optional[dict]:
-        with SessionLocal() as session:
+        with ReadSession() as session:
             statement = (
                 select(AccommodationOrderModel)
                 .where(AccommodationOrderModel.room_id == room_id)
@@ -227,7 +298,7 @@ class SQLiteRoomRepository(RoomRepository):
             }
 
     def add_accommodation_bill(self, bill: dict) -> None:
-        with SessionLocal() as session, session.begin():
+        with WriteSession() as session:
             session.add(
                 AccommodationBillModel(
                     bill_id=bill["bill_id"],
@@ -238,7 +309,7 @@ class SQLiteRoomRepository(RoomRepository):
             )
 
     def get_latest_accommodation_bill(self, room_id: str) -> Optional[dict]:
-        with SessionLocal() as session:
+        with ReadSession() as session:
             statement = (
                 select(AccommodationBillModel)
                 .where(AccommodationBillModel.room_id == room_id)
@@ -255,6 +326,24 @@ class SQLiteRoomRepository(RoomRepository):
             }
 
     # Helpers --------------------------------------------------------------
+    def _room_row(self, room: Room) -> dict:
+        return {
+            "room_id": room.room_id,
+            "status": room.status.value,
+            "current_temp": room.current_temp,
+            "target_temp": room.target_temp,
+            "initial_temp": room.initial_temp,
+            "mode": room.mode,
+            "speed": room.speed,
+            "is_serving": room.is_serving,
+            "total_fee": room.total_fee,
+            "rate_per_night": room.rate_per_night,
+            "active_service_id": room.active_service_id,
+            "last_temp_change_timestamp": room.last_temp_change_timestamp,
+            "pending_target_temp": room.pending_target_temp,
+            "manual_powered_off": room.manual_powered_off,
+        }
+
     def _room_from_model(self, model: RoomModel) -> Room:
         return Room(
             room_id=model.room_id,
@@ -280,15 +369,16 @@ class SQLiteRoomRepository(RoomRepository):
         return model
 
     def _populate_service_model(self, model: ServiceObjectModel, service: "ServiceObject") -> None:
+        snapshot = service.timer_snapshot()
         model.speed = service.speed
         model.started_at = service.started_at
-        model.served_seconds = service.served_seconds
-        model.wait_seconds = service.wait_seconds
-        model.total_waited_seconds = service.total_waited_seconds
+        model.served_seconds = snapshot.served_seconds
+        model.wait_seconds = snapshot.wait_seconds
+        model.total_waited_seconds = snapshot.total_waited_seconds
         model.priority_token = service.priority_token
         model.time_slice_enforced = service.time_slice_enforced
         model.status = service.status
-        model.current_fee = service.current_fee
+        model.current_fee = snapshot.current_fee
 
     def _service_object_from_wait(self, model: WaitEntryModel) -> "ServiceObject":
         from domain.service_object import ServiceObject, ServiceStatus
@@ -296,10 +386,10 @@ class SQLiteRoomRepository(RoomRepository):
         return ServiceObject(
             room_id=model.room_id,
             speed=model.speed,
-            wait_seconds=model.wait_seconds,
-            total_waited_seconds=model.total_waited_seconds,
             priority_token=model.priority_token,
+            time_slice_enforced=model.time_slice_enforced,
             status=ServiceStatus.WAITING,
+            timer_id=model.timer_id,
         )
 
     def _detail_from_model(self, model: ACDetailRecordModel) -> ACDetailRecord:
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from sqlalchemy import func
+from sqlalchemy import bindparam, func
 from sqlmodel import select
 
 from interfaces import deps
@@ -28,22 +30,30 @@ class ChangeSpeedRequest(BaseModel):
     speed: str
 
 
+# 房间、服务/等待条目与详单费用合计在一条查询中取回（服务/等待条目与房间一一对应）；
+# 语句只构建一次，room_id 以绑定参数传入
+_ROOM_STATE_STMT = (
+    select(
+        RoomModel,
+        ServiceObjectModel,
+        WaitEntryModel,
+        func.coalesce(func.sum(ACDetailRecordModel.fee_value), 0.0),
+    )
+    .select_from(RoomModel)
+    .outerjoin(ServiceObjectModel, ServiceObjectModel.room_id == RoomModel.room_id)
+    .outerjoin(WaitEntryModel, WaitEntryModel.room_id == RoomModel.room_id)
+    .outerjoin(ACDetailRecordModel, ACDetailRecordModel.room_id == RoomModel.room_id)
+    .where(RoomModel.room_id == bindparam("room_id"))
+    .group_by(RoomModel.room_id)
+)
+
+
 def _room_state(room_id: str) -> Dict[str, Any]:
     with SessionLocal() as session:
-        room = session.get(RoomModel, room_id)
-        if not room:
+        row = session.exec(_ROOM_STATE_STMT, params={"room_id": room_id}).first()
+        if not row:
             raise HTTPException(status_code=404, detail="Room not found")
-
-        service = session.get(ServiceObjectModel, room_id)
-        wait = session.get(WaitEntryModel, room_id)
-        fee_row = (
-            session.exec(
-                select(func.coalesce(func.sum(ACDetailRecordModel.fee_value), 0.0)).where(
-                    ACDetailRecordModel.room_id == room_id
-                )
-            ).first()
-            or 0.0
-        )
+        room, service, wait, fee_row = row
 
         # 从 TimeManager 获取实时计时数据
         served_seconds = 0
@@ -67,7 +77,6 @@ def _room_state(room_id: str) -> Dict[str, Any]:
             if timer_handle and timer_handle.is_valid:
                 waited_seconds = timer_handle.elapsed_seconds
 
-        temp_cfg = deps.settings.temperature or {}
         return {
             "roomId": room.room_id,
             "status": "serving" if service else ("waiting" if wait else ("occupied" if room.status == "OCCUPIED" else "idle")),
@@ -82,10 +91,38 @@ def _room_state(room_id: str) -> Dict[str, Any]:
             "waitedSeconds": waited_seconds,
             "mode": room.mode,
             "manualPowerOff": room.manual_powered_off,
-            "autoRestartThreshold": float(temp_cfg.get("auto_restart_threshold", 1.0)),
+            "autoRestartThreshold": deps.time_manager.auto_restart_threshold,
         }
 
 
+# 轮询短时缓存：同一房间在 TTL 内的重复查询复用上次结果；变更操作返回时写入最新状态
+_STATE_TTL_SECONDS = 0.25
+_state_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_state_cache_lock = threading.Lock()
+
+
+def _remember_state(room_id: str, started: float, state: Dict[str, Any]) -> None:
+    # 只保留开始时间最新的结果，避免变更前发起的慢查询覆盖变更后的状态
+    with _state_cache_lock:
+        entry = _state_cache.get(room_id)
+        if entry is None or entry[0] <= started:
+            _state_cache[room_id] = (started, state)
+
+
+def _fresh_room_state(room_id: str) -> Dict[str, Any]:
+    started = time.monotonic()
+    state = _room_state(room_id)
+    _remember_state(room_id, started, state)
+    return state
+
+
+def _polled_room_state(room_id: str) -> Dict[str, Any]:
+    entry = _state_cache.get(room_id)
+    if entry is not None and time.monotonic() - entry[0] < _STATE_TTL_SECONDS:
+        return entry[1]
+    return _fresh_room_state(room_id)
+
+
 # ========== 1. Power On ==========
 @router.post("/{room_id}/ac/power-on")
 def power_on(room_id: str, payload: Optional[PowerOnRequest] = None) -> Dict[str, Any]:
@@ -95,43 +132,32 @@ def power_on(room_id: str, payload: Optional[PowerOnRequest] = None) -> Dict[str
         payload.targetTemp if payload else None,
         payload.speed if payload else None,
     )
-    return _room_state(room_id)
+    return _fresh_room_state(room_id)
 
 
 # ========== 2. Power Off ==========
 @router.post("/{room_id}/ac/power-off")
 def power_off(room_id: str) -> Dict[str, Any]:
     deps.ac_service.power_off(room_id)
-    return _room_state(room_id)
+    return _fresh_room_state(room_id)
 
 
 # ========== 3. Change Temperature ==========
 @router.post("/{room_id}/ac/change-temp")
 def change_temp(room_id: str, payload: ChangeTempRequest) -> Dict[str, Any]:
     # 校验目标温度是否在配置的温度区间内；超出时不再报错，而是忽略本次请求并返回当前状态
-    temp_cfg = deps.settings.temperature or {}
-    cool_range = temp_cfg.get("cool_range") or []
-    heat_range = temp_cfg.get("heat_range") or []
-
-    with SessionLocal() as session:
-        room = session.get(RoomModel, room_id)
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
-        mode = (room.mode or "cool").lower()
-
-    allowed_min = None
-    allowed_max = None
-    if mode == "cool" and isinstance(cool_range, (list, tuple)) and len(cool_range) == 2:
-        allowed_min, allowed_max = float(cool_range[0]), float(cool_range[1])
-    elif mode == "heat" and isinstance(heat_range, (list, tuple)) and len(heat_range) == 2:
-        allowed_min, allowed_max = float(heat_range[0]), float(heat_range[1])
+    # 模式从仓储的房间缓存读取，不再为校验单独查询数据库
+    room = deps.repository.get_room(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    mode = (room.mode or "cool").lower()
 
-    if allowed_min is not None and not (allowed_min <= payload.targetTemp <= allowed_max):
+    if not deps.ac_service.target_temp_in_range(mode, payload.targetTemp):
         # 超出区间：保持目标温度不变，直接返回当前房间状态
-        return _room_state(room_id)
+        return _fresh_room_state(room_id)
 
     deps.ac_service.change_temp(room_id, payload.targetTemp)
-    return _room_state(room_id)
+    return _fresh_room_state(room_id)
 
 
 # ========== 4. Change Speed ==========
@@ -140,10 +166,10 @@ def change_speed(room_id: str, payload: ChangeSpeedRequest) -> Dict[str, Any]:
     if payload.speed not in ("HIGH", "MID", "LOW"):
         raise HTTPException(status_code=400, detail="invalid speed")
     deps.ac_service.change_speed(room_id, payload.speed)
-    return _room_state(room_id)
+    return _fresh_room_state(room_id)
 
 
 # ========== 5. Get State ==========
 @router.get("/{room_id}/ac/state")
 def ac_state(room_id: str) -> Dict[str, Any]:
-    return _room_state(room_id)
+    return _polled_room_state(room_id)
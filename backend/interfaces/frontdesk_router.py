@@ -11,7 +11,7 @@ from sqlmodel import select
 
 from interfaces import deps
 from domain.room import Room, RoomStatus
-from infrastructure.database import SessionLocal
+from infrastructure.database import SessionLocal, WriteSession
 from infrastructure.models import (
     AccommodationOrderModel,
     AccommodationBillModel,
@@ -79,11 +79,10 @@ def _get_or_create_room(room_id: str) -> Room:
 
 def _remove_wait_entry(room_id: str) -> None:
     """移除等待队列条目"""
-    with SessionLocal() as session:
+    with WriteSession() as session:
         model = session.get(WaitEntryModel, room_id)
         if model:
             session.delete(model)
-            session.commit()
 
 
 def _latest_accommodation_order(room_id: str) -> Optional[AccommodationOrderModel]:
@@ -8,7 +8,7 @@ from typing import Any, Dict, List, Optional
 import yaml
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 from sqlmodel import select
 
 from app.config import CONFIG_PATH
@@ -274,39 +274,33 @@ def _detail_fee_map_since_checkin(session) -> Dict[str, float]:
 
     If a room has no accommodation order, fall back to sum of all records (rare).
     """
-    # Fetch latest check-in time per room
-    order_rows = session.exec(
+    # 每个房间最近一次入住时间
+    latest_checkin = (
         select(
             AccommodationOrderModel.room_id,
-            func.max(AccommodationOrderModel.check_in_at)
-        ).group_by(AccommodationOrderModel.room_id)
+            func.max(AccommodationOrderModel.check_in_at).label("check_in_at"),
+        )
+        .group_by(AccommodationOrderModel.room_id)
+        .subquery()
+    )
+    # 一条 GROUP BY 查询汇总全部房间：有入住记录的只计入住之后的详单，否则计全部详单
+    rows = session.exec(
+        select(RoomModel.room_id, func.coalesce(func.sum(ACDetailRecordModel.fee_value), 0.0))
+        .select_from(RoomModel)
+        .outerjoin(latest_checkin, latest_checkin.c.room_id == RoomModel.room_id)
+        .outerjoin(
+            ACDetailRecordModel,
+            and_(
+                ACDetailRecordModel.room_id == RoomModel.room_id,
+                or_(
+                    latest_checkin.c.check_in_at.is_(None),
+                    ACDetailRecordModel.started_at >= latest_checkin.c.check_in_at,
+                ),
+            ),
+        )
+        .group_by(RoomModel.room_id)
     ).all()
-    latest_checkin_map: Dict[str, datetime] = {room_id: check_in_at for room_id, check_in_at in order_rows if check_in_at}
-
-    fee_map: Dict[str, float] = {}
-    # Rooms that have accommodation: sum fee_value where started_at >= check_in_at
-    for room_id, check_in_at in latest_checkin_map.items():
-        rows = session.exec(
-            select(func.coalesce(func.sum(ACDetailRecordModel.fee_value), 0.0)).where(
-                ACDetailRecordModel.room_id == room_id,
-                ACDetailRecordModel.started_at >= check_in_at,
-            )
-        ).all()
-        fee_map[room_id] = float(rows[0] if rows else 0.0)
-
-    # For rooms without accommodation orders, sum all records to avoid zeroing unexpectedly
-    rooms_without_order = session.exec(select(RoomModel.room_id)).all()
-    for rid in rooms_without_order:
-        if rid in fee_map:
-            continue
-        rows = session.exec(
-            select(func.coalesce(func.sum(ACDetailRecordModel.fee_value), 0.0)).where(
-                ACDetailRecordModel.room_id == rid
-            )
-        ).all()
-        fee_map[rid] = float(rows[0] if rows else 0.0)
-
-    return fee_map
+    return {room_id: float(total) for room_id, total in rows}
 
 
 def _hyperparams_from_settings() -> HyperParamResponse: